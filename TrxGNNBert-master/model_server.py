@@ -8,13 +8,17 @@ TrxGNNBert 模型推理服务器
 import os
 import sys
 import torch
-import pickle
-import json
 import numpy as np
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from datetime import datetime, timezone, timedelta
 import logging
+import threading
+import contextlib
+import queue
+import time
+from collections import OrderedDict
 
 # 添加项目路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -26,21 +30,152 @@ from pretrain.models.transformer_module import TransformerModule
 from pretrain.models.None_Phishing_Scam_Classfication import None_Phishing_Scam_Classfication
 from pretrain.utils.data_preprocessor import DataPreprocessor
 from pretrain.utils.argument import TrainingArguments, DataArguments, TokenizerArguments, ModelArguments
-from torch_geometric.data import Data
+from torch_geometric.data import Data, Batch
 import warnings
 warnings.filterwarnings('ignore')
 
+# 可选依赖：ONNX Runtime推理后端
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNX_AVAILABLE = False
+
+# 可选依赖：orjson加速JSON序列化
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 输入形状固定，允许cudnn自动选择最快的卷积算法
+torch.backends.cudnn.benchmark = True
+if hasattr(torch, 'set_float32_matmul_precision'):
+    torch.set_float32_matmul_precision("high")
+
+class OrjsonProvider(JSONProvider):
+    """使用orjson序列化JSON响应"""
+    
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option),
+            mimetype='application/json'
+        )
+
 # Flask应用初始化
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
 # 中国时区
 CHINA_TZ = timezone(timedelta(hours=8))
 
+# 动态批处理配置
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 10
+BATCH_REQUEST_TIMEOUT = 30  # 秒
+
+# 地址预测结果缓存容量
+ADDRESS_CACHE_SIZE = 65536
+
+# ONNX输出类型到(numpy, torch)数据类型的映射，GPU上导出的模型输出为float16
+ONNX_OUTPUT_DTYPES = {
+    'tensor(float)': (np.float32, torch.float32),
+    'tensor(float16)': (np.float16, torch.float16)
+}
+
+# ONNX模型导出目录，导出接口只允许写入该目录下
+ONNX_EXPORT_DIR = 'saved_models'
+
+# 模型预热使用的模拟地址
+WARMUP_ADDRESS = "0x" + "0" * 40
+
+def _mock_token_id(address, vocab_size):
+    """基于地址生成确定性的模拟token id"""
+    return hash(address) % (vocab_size - 10) + 5
+
+class AddressProbsCache:
+    """线程安全的地址预测概率LRU缓存，支持批量路径查询和回填
+    
+    每次安装新模型时递增代数，推理开始前记下代数，写入时代数已变化的结果
+    来自旧模型，直接丢弃
+    """
+    
+    def __init__(self, maxsize=ADDRESS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+    
+    def get(self, address):
+        """查询缓存，未命中返回None"""
+        with self._lock:
+            probs = self._data.get(address)
+            if probs is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(address)
+            self.hits += 1
+            return probs
+    
+    def put(self, address, probs, generation):
+        """写入缓存（代数过期则丢弃），超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[address] = probs
+            self._data.move_to_end(address)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """清空缓存和命中统计，并进入新的一代"""
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """缓存的命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+class OnnxExportWrapper(torch.nn.Module):
+    """将图数据输入展开为张量输入，便于导出ONNX"""
+    
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+    
+    def forward(self, x, edge_index, edge_attr):
+        y = torch.zeros((1,), dtype=torch.long, device=x.device)
+        graph_data = Data(x=x, edge_index=edge_index, edge_attr=edge_attr, y=y)
+        _, prob = self.model(graph_data)
+        return prob
+
 class TrxGNNBertInferenceService:
     """TrxGNNBert模型推理服务"""
     
@@ -48,9 +183,23 @@ class TrxGNNBertInferenceService:
         """初始化推理服务"""
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.model = None
+        # 量化前的FP32模型，ONNX导出不支持动态量化算子
+        self._fp32_model = None
         self.tokenizer_args = None
         self.data_preprocessor = None
         self.is_loaded = False
+        self.cuda_graph = None
+        self.static_out = None
+        self._buf_graph = None
+        self.onnx_session = None
+        self._onnx_output_dtype = ONNX_OUTPUT_DTYPES['tensor(float)']
+        # CUDA上使用FP16权重和autocast，利用Tensor Core
+        self.use_fp16 = self.device.type == 'cuda'
+        # CUDA上主机端输入使用锁页内存，支持异步拷贝
+        self.pin_memory = self.device.type == 'cuda'
+        self._buffer_lock = threading.Lock()
+        # 无交易数据时预测结果只由地址决定，按地址缓存预测概率
+        self._address_cache = AddressProbsCache(ADDRESS_CACHE_SIZE)
         
         # 风险类型映射
         self.risk_mapping = {
@@ -67,7 +216,7 @@ class TrxGNNBertInferenceService:
         
         logger.info(f"初始化TrxGNNBert推理服务，设备: {self.device}")
         
-    def load_model(self, model_path, config_path=None):
+    def load_model(self, model_path, config_path=None, compile_model=False):
         """加载预训练模型"""
         try:
             # 设置模型配置（这里需要根据实际训练配置调整）
@@ -82,6 +231,18 @@ class TrxGNNBertInferenceService:
                 UNK_TOKEN_ID=3,
                 MASK_TOKEN_ID=4
             )
+            # 旧的CUDA Graph捕获在即将释放的缓冲区上，重新分配前先停用
+            with self._buffer_lock:
+                self.is_loaded = False
+                self.cuda_graph = None
+                self.static_out = None
+                self._allocate_input_buffers()
+            
+            # ONNX模型使用ONNX Runtime推理
+            if model_path.endswith('.onnx'):
+                return self._load_onnx_session(model_path)
+            self.onnx_session = None
+            self._fp32_model = None
             
             # 创建模型组件
             gnn_module = GNNModule(
@@ -122,7 +283,23 @@ class TrxGNNBertInferenceService:
             
             self.model.to(self.device)
             self.model.eval()
+            if self.use_fp16:
+                self.model.half()
+            elif self.device.type == 'cpu':
+                self._quantize_model()
+            
+            # torch.compile的reduce-overhead模式自带CUDA Graph，无需重复捕获
+            warmed_up = False
+            if compile_model:
+                warmed_up = self._compile_model()
+            else:
+                self._capture_cuda_graph()
+            # 新模型安装后旧模型的缓存结果失效
+            self._address_cache.clear()
             self.is_loaded = True
+            # 编译时已按请求路径预热，不再重复
+            if not warmed_up:
+                self._try_warmup()
             
             # 初始化数据预处理器
             self.data_preprocessor = DataPreprocessor(
@@ -140,6 +317,233 @@ class TrxGNNBertInferenceService:
             logger.error(f"模型加载失败: {str(e)}")
             return False
     
+    def _load_onnx_session(self, model_path):
+        """加载ONNX模型并创建ONNX Runtime推理会话"""
+        if not ONNX_AVAILABLE:
+            logger.error("未安装onnxruntime，无法加载ONNX模型")
+            return False
+        
+        if not os.path.exists(model_path):
+            logger.error(f"ONNX模型文件不存在: {model_path}")
+            return False
+        
+        if self.device.type == 'cuda':
+            providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
+        else:
+            providers = ['CPUExecutionProvider']
+        
+        self.onnx_session = ort.InferenceSession(model_path, providers=providers)
+        self._fp32_model = None
+        output_type = self.onnx_session.get_outputs()[0].type
+        if output_type not in ONNX_OUTPUT_DTYPES:
+            logger.error(f"不支持的ONNX输出类型: {output_type}")
+            self.onnx_session = None
+            return False
+        self._onnx_output_dtype = ONNX_OUTPUT_DTYPES[output_type]
+        self.model = None
+        self.cuda_graph = None
+        # 新模型安装后旧模型的缓存结果失效
+        self._address_cache.clear()
+        self.is_loaded = True
+        self._try_warmup()
+        logger.info(f"ONNX模型加载完成: {model_path}")
+        return True
+    
+    def export_onnx(self, path):
+        """将当前PyTorch模型导出为ONNX格式"""
+        if self.model is None:
+            logger.error("模型未加载，无法导出ONNX")
+            return False
+        
+        try:
+            dummy_graph = Data(
+                x=torch.zeros((2, 128), dtype=torch.long),
+                edge_index=torch.tensor([[0, 1], [1, 0]], dtype=torch.long),
+                edge_attr=torch.zeros((2, 128), dtype=torch.long)
+            ).to(self.device)
+            if self._fp32_model is not None:
+                export_model = self._fp32_model
+            else:
+                export_model = getattr(self.model, '_orig_mod', self.model)
+            wrapper = OnnxExportWrapper(export_model)
+            torch.onnx.export(
+                wrapper,
+                (dummy_graph.x, dummy_graph.edge_index, dummy_graph.edge_attr),
+                path,
+                input_names=['x', 'edge_index', 'edge_attr'],
+                output_names=['prob'],
+                opset_version=17,
+                dynamic_axes={
+                    'x': {0: 'num_nodes'},
+                    'edge_index': {1: 'num_edges'},
+                    'edge_attr': {0: 'num_edges'}
+                }
+            )
+            logger.info(f"ONNX模型导出成功: {path}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"ONNX模型导出失败: {str(e)}")
+            return False
+    
+    def _run_onnx(self, graph_data):
+        """通过IO-binding执行ONNX推理，输入输出均保留在设备上"""
+        device_type = self.device.type
+        device_id = self.device.index or 0
+        
+        # 输入由torch的stream异步拷贝，ONNX Runtime使用自己的stream，需先等待拷贝完成
+        if device_type == 'cuda':
+            torch.cuda.current_stream().synchronize()
+        
+        binding = self.onnx_session.io_binding()
+        for name in ('x', 'edge_index', 'edge_attr'):
+            tensor = graph_data[name].contiguous()
+            binding.bind_input(
+                name=name,
+                device_type=device_type,
+                device_id=device_id,
+                element_type=np.int64,
+                shape=tuple(tensor.shape),
+                buffer_ptr=tensor.data_ptr()
+            )
+        
+        np_dtype, torch_dtype = self._onnx_output_dtype
+        pred_prob = torch.empty((len(self.risk_mapping),), dtype=torch_dtype, device=self.device)
+        binding.bind_output(
+            name='prob',
+            device_type=device_type,
+            device_id=device_id,
+            element_type=np_dtype,
+            shape=tuple(pred_prob.shape),
+            buffer_ptr=pred_prob.data_ptr()
+        )
+        self.onnx_session.run_with_iobinding(binding)
+        return pred_prob
+    
+    def _quantize_model(self):
+        """CPU上对Linear层做INT8动态量化"""
+        try:
+            quantization = getattr(torch, 'ao', torch).quantization
+            # quantize_dynamic返回量化副本，保留原FP32模型用于导出
+            self._fp32_model = self.model
+            self.model = quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            logger.info("模型INT8动态量化完成")
+        except Exception as e:
+            logger.warning(f"模型量化失败，使用FP32推理: {str(e)}")
+    
+    def _compile_model(self):
+        """使用torch.compile编译模型，减少逐算子的Python调度开销；返回是否已完成预热"""
+        if not hasattr(torch, 'compile'):
+            logger.warning("当前PyTorch版本不支持torch.compile，使用常规推理")
+            return False
+        
+        try:
+            self.model = torch.compile(self.model, mode="reduce-overhead", fullgraph=False)
+            # 预热触发编译和cudnn算法选择
+            self._warmup_model()
+            logger.info("模型编译完成")
+            return True
+        except Exception as e:
+            self.model = getattr(self.model, '_orig_mod', self.model)
+            logger.warning(f"模型编译失败，使用常规推理: {str(e)}")
+            return False
+    
+    def _autocast(self):
+        """推理时的混合精度上下文，CPU上不启用"""
+        if not self.use_fp16:
+            return contextlib.nullcontext()
+        # CUDA Graph捕获要求关闭autocast缓存
+        return torch.autocast(device_type='cuda', dtype=torch.float16, cache_enabled=False)
+    
+    def _warmup_model(self, steps=3):
+        """按实际请求路径执行若干次推理，使首个请求不承担初始化和kernel选择开销"""
+        for _ in range(steps):
+            self._predict_address_probs(WARMUP_ADDRESS)
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize()
+    
+    def _try_warmup(self):
+        """加载完成后预热模型，预热失败不影响加载结果"""
+        try:
+            self._warmup_model()
+            logger.info("模型预热完成")
+        except Exception as e:
+            logger.warning(f"模型预热失败: {str(e)}")
+    
+    def _allocate_input_buffers(self):
+        """预分配单地址推理的设备端输入缓冲区，请求间复用"""
+        # 边索引、边属性和标签在请求间不变，只在设备上生成一次
+        self._const_edge_index = torch.tensor([[0, 1], [1, 0]], dtype=torch.long, device=self.device)
+        self._const_edge_attr = torch.randint(
+            0, self.tokenizer_args.vocab_size, (2, 128), device=self.device
+        ).contiguous()
+        self._const_y = torch.zeros((1,), dtype=torch.long, device=self.device)
+        
+        # 单地址推理的输入形状固定：2个节点、2条边、序列长度128；只有节点特征逐请求变化
+        self._buf_x = torch.zeros((2, 128), dtype=torch.long, device=self.device)
+        self._buf_graph = Data(
+            x=self._buf_x,
+            edge_index=self._const_edge_index,
+            edge_attr=self._const_edge_attr,
+            y=self._const_y
+        )
+    
+    def _can_use_input_buffers(self, graph_data):
+        """判断输入能否使用预分配缓冲区（节点特征形状一致且边数据为常量）"""
+        return (
+            self._buf_graph is not None
+            and graph_data.x.shape == self._buf_x.shape
+            and graph_data.edge_index is self._const_edge_index
+            and graph_data.edge_attr is self._const_edge_attr
+        )
+    
+    def _to_device(self, graph_data):
+        """将图数据异步拷贝到设备（源张量为锁页内存时与后续计算重叠）"""
+        return graph_data.to(self.device, non_blocking=True)
+    
+    def _load_input_buffers(self, graph_data):
+        """将节点特征拷贝到预分配缓冲区，返回引用缓冲区的图数据"""
+        self._buf_x.copy_(graph_data.x, non_blocking=True)
+        return self._buf_graph
+    
+    def _capture_cuda_graph(self):
+        """捕获单地址推理的CUDA Graph，减少batch=1时的kernel启动开销"""
+        self.cuda_graph = None
+        if self.device.type != 'cuda':
+            return
+        
+        try:
+            # 捕获前先在旁路stream上预热
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(stream), torch.inference_mode(), self._autocast():
+                for _ in range(3):
+                    self.model(self._buf_graph)
+            torch.cuda.current_stream().wait_stream(stream)
+            
+            graph = torch.cuda.CUDAGraph()
+            with torch.inference_mode(), self._autocast(), torch.cuda.graph(graph):
+                self.static_out = self.model(self._buf_graph)
+            self.cuda_graph = graph
+            logger.info("CUDA Graph捕获完成")
+            
+        except Exception as e:
+            self.cuda_graph = None
+            logger.warning(f"CUDA Graph捕获失败，使用常规推理: {str(e)}")
+    
+    def _forward_single(self, graph_data):
+        """对设备上的单个地址图数据执行前向推理"""
+        if self.onnx_session is not None:
+            return self._run_onnx(graph_data)
+        
+        # CUDA Graph只能在捕获时使用的输入缓冲区上重放
+        if self.cuda_graph is not None and graph_data is self._buf_graph:
+            self.cuda_graph.replay()
+            return self.static_out[1].clone()
+        
+        true_label, pred_prob = self.model(graph_data)
+        return pred_prob
+    
     def preprocess_address_data(self, address, transaction_data=None):
         """预处理地址数据为模型输入格式"""
         try:
@@ -154,13 +558,13 @@ class TrxGNNBertInferenceService:
                 node_features = self._generate_mock_features(address)
             
             # 边索引 (连接关系)
-            edge_index = torch.tensor([[0, 1], [1, 0]], dtype=torch.long)
+            edge_index = self._const_edge_index
             
             # 边属性
-            edge_attr = torch.randint(0, self.tokenizer_args.vocab_size, (2, 128))
+            edge_attr = self._const_edge_attr
             
             # 标签 (预测时设为0)
-            y = torch.tensor([0])
+            y = self._const_y
             
             # 构造图数据
             graph_data = Data(
@@ -179,60 +583,163 @@ class TrxGNNBertInferenceService:
     def _extract_transaction_features(self, transaction_data):
         """从交易数据提取特征"""
         # 简化实现：将交易数据转换为token序列
-        features = torch.randint(0, self.tokenizer_args.vocab_size, (2, 128))
+        # 与模拟特征一样留在主机端（锁页内存），批量合并时各图的x位于同一设备
+        features = torch.randint(0, self.tokenizer_args.vocab_size, (2, 128), pin_memory=self.pin_memory)
         return features
     
     def _generate_mock_features(self, address):
         """生成模拟特征（用于测试）"""
         # 基于地址生成确定性的特征
-        hash_val = hash(address) % (self.tokenizer_args.vocab_size - 10) + 5
-        features = torch.full((2, 128), hash_val, dtype=torch.long)
+        hash_val = _mock_token_id(address, self.tokenizer_args.vocab_size)
+        features = torch.full((2, 128), hash_val, dtype=torch.long, pin_memory=self.pin_memory)
         return features
     
-    def predict_address_risk(self, address, transaction_data=None):
+    def predict_address_risk(self, address, transaction_data=None, now_iso=None):
         """预测地址风险"""
         if not self.is_loaded:
             return {'error': '模型未加载'}
         
         try:
-            # 预处理数据
-            graph_data = self.preprocess_address_data(address, transaction_data)
-            if graph_data is None:
-                return {'error': '数据预处理失败'}
-            
-            # 模型推理
-            with torch.no_grad():
-                graph_data = graph_data.to(self.device)
-                true_label, pred_prob = self.model(graph_data)
-                
-                # 获取预测结果
-                pred_class = torch.argmax(pred_prob).item()
-                confidence = pred_prob[pred_class].item()
-                
-                risk_type = self.risk_mapping.get(pred_class, 'unknown')
-                risk_info = self.risk_description.get(risk_type, {
-                    'level': 'unknown', 
-                    'description': '未知风险类型'
-                })
-                
-                return {
-                    'address': address,
-                    'risk_type': risk_type,
-                    'risk_level': risk_info['level'],
-                    'confidence': float(confidence),
-                    'description': risk_info['description'],
-                    'prediction_scores': {
-                        'normal': float(pred_prob[0]),
-                        'phishing': float(pred_prob[1]),
-                        'scam': float(pred_prob[2])
-                    },
-                    'timestamp': datetime.now(CHINA_TZ).isoformat()
-                }
+            if transaction_data:
+                probs = self._predict_address_probs(address, transaction_data)
+            else:
+                generation = self._address_cache.generation
+                probs = self._address_cache.get(address)
+                if probs is None:
+                    probs = self._predict_address_probs(address)
+                    self._address_cache.put(address, probs, generation)
+            return self._format_prediction(address, probs, now_iso)
                 
         except Exception as e:
             logger.error(f"风险预测失败: {str(e)}")
             return {'error': f'预测失败: {str(e)}'}
     
+    def _predict_address_probs(self, address, transaction_data=None):
+        """对单个地址执行推理，返回CPU上的预测概率"""
+        # 预处理数据
+        graph_data = self.preprocess_address_data(address, transaction_data)
+        if graph_data is None:
+            raise ValueError('数据预处理失败')
+        
+        # 模型推理
+        with torch.inference_mode(), self._autocast():
+            if self._can_use_input_buffers(graph_data):
+                # 输入缓冲区在请求间共享，需要串行化
+                with self._buffer_lock:
+                    buf_graph = self._load_input_buffers(graph_data)
+                    pred_prob = self._forward_single(buf_graph)
+            else:
+                pred_prob = self._forward_single(self._to_device(graph_data))
+            return self._probs_to_host(pred_prob)
+    
+    def cache_stats(self):
+        """地址预测缓存的命中统计"""
+        return self._address_cache.stats()
+    
+    def predict_addresses_batch(self, addresses, transaction_data_list=None, now_iso=None):
+        """批量预测地址风险（按MAX_BATCH_SIZE分块合并为Batch，每块一次前向推理）"""
+        if not self.is_loaded:
+            return [{'error': '模型未加载'} for _ in addresses]
+        
+        if transaction_data_list is None:
+            transaction_data_list = [None] * len(addresses)
+        
+        # 同一批结果共用一个时间戳
+        now_iso = now_iso or datetime.now(CHINA_TZ).isoformat()
+        
+        # 分块推理限制显存占用，某一块失败不影响其他块
+        results = []
+        for start in range(0, len(addresses), MAX_BATCH_SIZE):
+            end = start + MAX_BATCH_SIZE
+            results.extend(self._predict_batch_chunk(
+                addresses[start:end], transaction_data_list[start:end], now_iso
+            ))
+        return results
+    
+    def _predict_batch_chunk(self, addresses, transaction_data_list, now_iso):
+        """对一块地址合并为一个Batch执行单次前向推理"""
+        results = [None] * len(addresses)
+        generation = self._address_cache.generation
+        try:
+            # 预处理数据，预处理失败的地址单独返回错误；无交易数据的地址先查缓存
+            graphs = []
+            indices = []
+            for i, (address, transaction_data) in enumerate(zip(addresses, transaction_data_list)):
+                if not transaction_data:
+                    probs = self._address_cache.get(address)
+                    if probs is not None:
+                        results[i] = self._format_prediction(address, probs, now_iso)
+                        continue
+                graph_data = self.preprocess_address_data(address, transaction_data)
+                if graph_data is None:
+                    results[i] = {'error': '数据预处理失败'}
+                    continue
+                graphs.append(graph_data)
+                indices.append(i)
+            
+            if not graphs:
+                return results
+            
+            # 模型推理
+            with torch.inference_mode(), self._autocast():
+                if self.onnx_session is not None:
+                    # 导出的ONNX图按单个地址汇总概率，逐个执行
+                    pred_probs = torch.stack([self._run_onnx(self._to_device(graph_data)) for graph_data in graphs])
+                else:
+                    # 各图的节点特征不在同一设备时无法合并，先统一拷贝到设备
+                    if len({graph_data.x.device for graph_data in graphs}) > 1:
+                        graphs = [self._to_device(graph_data) for graph_data in graphs]
+                    batched = Batch.from_data_list(graphs)
+                    if self.pin_memory:
+                        # 边索引、边属性等常量已在设备上，只锁页主机端张量
+                        batched = batched.apply(lambda t: t if t.is_cuda else t.pin_memory())
+                    batched = self._to_device(batched)
+                    pred_probs = self.model.predict_batch(batched)
+            
+            # 整块的概率只做一次设备到主机的拷贝
+            probs = self._probs_to_host(pred_probs)
+            for i, row in zip(indices, probs):
+                if not transaction_data_list[i]:
+                    self._address_cache.put(addresses[i], row.copy(), generation)
+                results[i] = self._format_prediction(addresses[i], row, now_iso)
+            return results
+            
+        except Exception as e:
+            logger.error(f"批量风险预测失败: {str(e)}")
+            return [result or {'error': f'预测失败: {str(e)}'} for result in results]
+    
+    def _probs_to_host(self, pred_prob):
+        """一次性将预测概率拷贝到CPU，避免逐元素.item()触发多次同步"""
+        # FP16推理结果转回FP32再读取
+        return pred_prob.detach().float().cpu().numpy()
+    
+    def _format_prediction(self, address, probs, now_iso=None):
+        """将单个地址的预测概率（CPU上的numpy数组）转换为响应结果"""
+        # 获取预测结果
+        probs = probs.ravel()
+        pred_class = int(probs.argmax())
+        confidence = float(probs[pred_class])
+        
+        risk_type = self.risk_mapping.get(pred_class, 'unknown')
+        risk_info = self.risk_description.get(risk_type, {
+            'level': 'unknown', 
+            'description': '未知风险类型'
+        })
+        
+        return {
+            'address': address,
+            'risk_type': risk_type,
+            'risk_level': risk_info['level'],
+            'confidence': confidence,
+            'description': risk_info['description'],
+            'prediction_scores': {
+                'normal': float(probs[0]),
+                'phishing': float(probs[1]),
+                'scam': float(probs[2])
+            },
+            'timestamp': now_iso or datetime.now(CHINA_TZ).isoformat()
+        }
+    
     def predict_transaction_risk(self, tx_hash, tx_data=None):
         """预测交易风险"""
         # 交易风险预测逻辑类似地址风险预测
@@ -264,8 +771,78 @@ class TrxGNNBertInferenceService:
             logger.error(f"交易风险预测失败: {str(e)}")
             return {'error': f'预测失败: {str(e)}'}
 
+class BatchScheduler:
+    """动态批处理调度器，将并发的单地址预测请求合并为一次批量推理"""
+    
+    def __init__(self, service, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker_thread = None
+        self._start_lock = threading.Lock()
+    
+    def start(self):
+        """启动后台工作线程（首次提交时自动启动，兼容fork后的工作进程）"""
+        with self._start_lock:
+            if self._worker_thread is None or not self._worker_thread.is_alive():
+                self._worker_thread = threading.Thread(target=self._run, daemon=True)
+                self._worker_thread.start()
+    
+    def submit(self, address, transaction_data=None, timeout=BATCH_REQUEST_TIMEOUT):
+        """提交单个地址预测请求并等待结果"""
+        self.start()
+        pending = {
+            'address': address,
+            'transaction_data': transaction_data,
+            'event': threading.Event(),
+            'result': None
+        }
+        self._queue.put(pending)
+        
+        if not pending['event'].wait(timeout):
+            return {'error': '预测超时'}
+        return pending['result']
+    
+    def _run(self):
+        """工作线程：凑满batch或等待超时后执行一次推理"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+    
+    def _dispatch(self, batch):
+        """执行推理并唤醒等待的请求"""
+        now_iso = datetime.now(CHINA_TZ).isoformat()
+        try:
+            if len(batch) == 1:
+                # 单个请求走单地址路径，可复用CUDA Graph
+                results = [self.service.predict_address_risk(batch[0]['address'], batch[0]['transaction_data'], now_iso)]
+            else:
+                results = self.service.predict_addresses_batch(
+                    [pending['address'] for pending in batch],
+                    [pending['transaction_data'] for pending in batch],
+                    now_iso
+                )
+        except Exception as e:
+            logger.error(f"批处理调度失败: {str(e)}")
+            results = [{'error': f'预测失败: {str(e)}'} for _ in batch]
+        
+        for pending, result in zip(batch, results):
+            pending['result'] = result
+            pending['event'].set()
+
 # 全局模型服务实例
 model_service = TrxGNNBertInferenceService()
+batch_scheduler = BatchScheduler(model_service)
 
 @app.route('/api/model/health', methods=['GET'])
 def health_check():
@@ -274,6 +851,7 @@ def health_check():
         'status': 'healthy',
         'model_loaded': model_service.is_loaded,
         'device': str(model_service.device),
+        'cache': model_service.cache_stats(),
         'timestamp': datetime.now(CHINA_TZ).isoformat()
     })
 
@@ -282,8 +860,10 @@ def load_model():
     """加载模型"""
     data = request.get_json() or {}
     model_path = data.get('model_path', 'saved_models/best_model.pth')
+    # 只接受JSON布尔值，字符串"false"等不视为开启
+    compile_model = data.get('compile_model') is True
     
-    success = model_service.load_model(model_path)
+    success = model_service.load_model(model_path, compile_model=compile_model)
     
     return jsonify({
         'status': 'success' if success else 'error',
@@ -291,6 +871,25 @@ def load_model():
         'model_loaded': model_service.is_loaded
     })
 
+@app.route('/api/model/export_onnx', methods=['POST'])
+def export_onnx():
+    """导出ONNX模型"""
+    data = request.get_json() or {}
+    # 只取文件名，防止写入导出目录之外的路径
+    file_name = os.path.basename(str(data.get('onnx_path', 'best_model.onnx')))
+    if not file_name.endswith('.onnx') or file_name == '.onnx':
+        return jsonify({'error': 'ONNX文件名无效'}), 400
+    
+    os.makedirs(ONNX_EXPORT_DIR, exist_ok=True)
+    onnx_path = os.path.join(ONNX_EXPORT_DIR, file_name)
+    success = model_service.export_onnx(onnx_path)
+    
+    return jsonify({
+        'status': 'success' if success else 'error',
+        'message': 'ONNX模型导出成功' if success else 'ONNX模型导出失败',
+        'onnx_path': onnx_path
+    })
+
 @app.route('/api/model/predict_address', methods=['POST'])
 def predict_address():
     """预测地址风险"""
@@ -300,9 +899,13 @@ def predict_address():
         return jsonify({'error': '缺少地址参数'}), 400
     
     address = data['address']
+    # 请求会与其他请求合并推理，非法地址需在进入调度器前拒绝
+    if not isinstance(address, str):
+        return jsonify({'error': '地址参数必须是字符串'}), 400
     transaction_data = data.get('transaction_data', None)
     
-    result = model_service.predict_address_risk(address, transaction_data)
+    # 并发请求由调度器合并为批量推理
+    result = batch_scheduler.submit(address, transaction_data)
     
     if 'error' in result:
         return jsonify(result), 500
@@ -342,11 +945,10 @@ def batch_predict():
         return jsonify({'error': '缺少地址列表参数'}), 400
     
     addresses = data['addresses']
-    results = []
-    
-    for address in addresses:
-        result = model_service.predict_address_risk(address)
-        results.append(result)
+    if not isinstance(addresses, list) or not all(isinstance(address, str) for address in addresses):
+        return jsonify({'error': '地址列表参数必须是字符串列表'}), 400
+    now_iso = datetime.now(CHINA_TZ).isoformat()
+    results = model_service.predict_addresses_batch(addresses, now_iso=now_iso)
     
     return jsonify({
         'status': 'success',
@@ -354,17 +956,19 @@ def batch_predict():
         'count': len(results)
     })
 
-if __name__ == '__main__':
-    # 启动时尝试加载模型
+def init_model_service(model_path='saved_models/best_model.pth'):
+    """启动时尝试加载模型"""
     logger.info("启动TrxGNNBert推理服务...")
     
     # 检查模型文件是否存在
-    model_path = 'saved_models/best_model.pth'
     if not os.path.exists(model_path):
         logger.warning(f"模型文件不存在: {model_path}")
         logger.info("服务将以未加载模型状态启动，请通过API加载模型")
     else:
         model_service.load_model(model_path)
+
+if __name__ == '__main__':
+    init_model_service()
     
-    # 启动服务
-    app.run(host='0.0.0.0', port=5001, debug=False) 
\ No newline at end of file
+    # 启动服务（开发模式，生产环境请使用wsgi.py）
+    app.run(host='0.0.0.0', port=5001, debug=False)
@@ -8,6 +8,7 @@ import copy
 from torch.nn import CrossEntropyLoss, MSELoss
 from pretrain.models.TrxGNNGPT import TrxGNNGPT
 import torch.nn.functional as F
+from torch_geometric.nn import global_add_pool
 import pdb
 import numpy as np
 from transformers import get_linear_schedule_with_warmup
@@ -49,6 +50,14 @@ class None_Phishing_Scam_Classfication(nn.Module):
         logits=torch.sum(outputs,axis=0)
         prob=F.softmax(logits)
         return torch.tensor(graph_data.y),prob
+
+    def predict_batch(self, graph_data):
+        # graph_data 为 torch_geometric 的 Batch，按 batch 向量分别聚合每个图的 logits
+        _, _, embeddings_proj, _=self.encoder.get_embedding(graph_data)
+        outputs = self.classifier(embeddings_proj)
+        logits = global_add_pool(outputs, graph_data.batch)
+        prob = F.softmax(logits, dim=-1)
+        return prob
     
 
       
@@ -145,13 +145,8 @@ class TrxGNNGPT(nn.Module):
         tmp = graph_data.clone()
         token_data = node_data.to(device)
         # print(token_data.shape)
-        embeddings = []
-        for batch in token_data:
-            batch = torch.unsqueeze(batch, dim=0)
-            batch = batch.to(device)
-            output = self.embedding_layer(batch)
-            embeddings.append(output)
-        embeddings = torch.cat(embeddings, dim=0)
+        # 一次性对所有节点做embedding，避免逐行调用后再拼接
+        embeddings = self.embedding_layer(token_data)
         tmp["x"] = embeddings.reshape(embeddings.shape[0],-1).to(device)
         # if masked_edge:
         #     masked_edge_data,labels= self.mask_label(tmp["edge_attr"],False, masked_edge, graph_data['y'],index = graph_data['edge_index'])
@@ -159,13 +154,7 @@ class TrxGNNGPT(nn.Module):
         edge_data = graph_data["edge_attr"]
         # token_data = self.esperanto_dataset.tokenizer_node(graph_data["edge_attr"])
         token_data = edge_data.to(device)
-        embeddings = []
-        for batch in token_data:
-            batch = torch.unsqueeze(batch, dim=0)
-            batch = batch.to(device)
-            output = self.embedding_layer(batch)
-            embeddings.append(output)
-        embeddings = torch.cat(embeddings, dim=0)
+        embeddings = self.embedding_layer(token_data)
         tmp["edge_attr"] = embeddings.reshape(embeddings.shape[0],-1).to(device)
         tmp['edge_index'] = graph_data['edge_index'].to(device)
         embeddings = self.gnn_module.forward(tmp)   
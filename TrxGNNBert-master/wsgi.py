@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TrxGNNBert 模型推理服务 WSGI 入口
+生产环境使用gunicorn启动，单个GPU工作进程 + 多线程：
+
+    gunicorn -w 1 --threads 8 -k gthread wsgi:app -b 0.0.0.0:5001
+
+不要使用 --preload：模型（及CUDA Graph）需在工作进程内加载，主进程中
+初始化CUDA后fork出的子进程无法再使用CUDA。本模块在工作进程中导入，
+模型随之加载；多线程使JSON解析、数据预处理和响应序列化与GPU推理并行，
+并发请求由BatchScheduler合并为批量推理
+"""
+
+from model_server import app, init_model_service
+
+init_model_service()
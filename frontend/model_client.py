@@ -7,15 +7,41 @@
 
 import requests
 import json
-import time
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any
 
+# 可选依赖：批量兜底预测的向量化计算
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 中国时区
+CHINA_TZ = timezone(timedelta(hours=8))
+
+def _addr_score(addr: str) -> float:
+    """基于地址末8位十六进制计算风险分数，跨进程结果一致"""
+    try:
+        return (int(addr[-8:], 16) & 0xFF) / 256.0
+    except (ValueError, TypeError):
+        # 非十六进制地址退回到哈希
+        return (abs(hash(addr)) % 256) / 256.0
+
+# 规则引擎兜底结果 (risk_type, risk_level, description)，按风险等级索引
+FALLBACK_ADDRESS_RULES = (
+    ('phishing', 'high', '地址可能存在钓鱼风险（基于规则引擎分析）'),
+    ('scam', 'medium', '地址可能存在诈骗风险（基于规则引擎分析）'),
+    ('normal', 'safe', '地址行为正常（基于规则引擎分析）')
+)
+
 class ModelClient:
     """TrxGNNBert模型服务客户端"""
     
@@ -25,11 +51,27 @@ class ModelClient:
         self.timeout = timeout
         self.max_retries = max_retries
         self.session = requests.Session()
+        # 并发请求使用的线程池
+        self._executor = ThreadPoolExecutor(max_workers=16)
+        
+        # 连接池与重试策略（指数退避），复用长连接避免重复建立TCP连接
+        # max_retries表示总尝试次数，Retry的total只计重试次数
+        retry = Retry(
+            total=max(self.max_retries - 1, 0),
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=frozenset(['GET', 'POST']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
         # 设置请求头
         self.session.headers.update({
             'Content-Type': 'application/json',
-            'User-Agent': '鉴诈链图-Frontend/1.0'
+            'User-Agent': '鉴诈链图-Frontend/1.0',
+            'Connection': 'keep-alive'
         })
         
         logger.info(f"初始化模型客户端，服务地址: {self.model_server_url}")
@@ -38,26 +80,21 @@ class ModelClient:
         """发送HTTP请求到模型服务"""
         url = f"{self.model_server_url}{endpoint}"
         
-        for attempt in range(self.max_retries):
-            try:
-                if method.upper() == 'GET':
-                    response = self.session.get(url, timeout=self.timeout)
-                elif method.upper() == 'POST':
-                    response = self.session.post(url, json=data, timeout=self.timeout)
-                else:
-                    raise ValueError(f"不支持的HTTP方法: {method}")
-                
-                response.raise_for_status()
-                return response.json()
-                
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"请求失败 (尝试 {attempt + 1}/{self.max_retries}): {str(e)}")
-                if attempt == self.max_retries - 1:
-                    logger.error(f"模型服务请求最终失败: {str(e)}")
-                    return {'error': f'模型服务连接失败: {str(e)}'}
-                time.sleep(1)  # 重试延迟
-        
-        return {'error': '模型服务请求失败'}
+        # 重试由连接池适配器的Retry策略处理
+        try:
+            if method.upper() == 'GET':
+                response = self.session.get(url, timeout=self.timeout)
+            elif method.upper() == 'POST':
+                response = self.session.post(url, json=data, timeout=self.timeout)
+            else:
+                raise ValueError(f"不支持的HTTP方法: {method}")
+            
+            response.raise_for_status()
+            return response.json()
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"模型服务请求最终失败: {str(e)}")
+            return {'error': f'模型服务连接失败: {str(e)}'}
     
     def check_health(self) -> Dict[str, Any]:
         """检查模型服务健康状态"""
@@ -80,6 +117,10 @@ class ModelClient:
         
         return result
     
+    def predict_address_risk_async(self, address: str, transaction_data: Optional[Dict] = None) -> Future:
+        """异步预测地址风险，返回Future以便与其他I/O并行"""
+        return self._executor.submit(self.predict_address_risk, address, transaction_data)
+    
     def predict_transaction_risk(self, tx_hash: str, tx_data: Optional[Dict] = None) -> Dict[str, Any]:
         """预测交易风险"""
         data = {
@@ -105,34 +146,39 @@ class ModelClient:
         
         result = self._make_request('POST', '/api/model/batch_predict', data)
         
-        # 如果模型服务失败，返回兜底方案
         if 'error' in result:
-            logger.warning(f"批量预测失败，使用兜底方案: {result['error']}")
+            # 模型服务不可用时直接对整批地址使用兜底方案
+            if not self.is_available():
+                logger.warning(f"批量预测失败，使用兜底方案: {result['error']}")
+                return {
+                    'status': 'success',
+                    'data': self._fallback_batch_prediction(addresses),
+                    'count': len(addresses)
+                }
+            
+            # 批量接口失败，并行逐个请求（单个请求失败时各自使用兜底方案）
+            logger.warning(f"批量预测失败，改为并行单个预测: {result['error']}")
+            results = list(self._executor.map(self.predict_address_risk, addresses))
             return {
                 'status': 'success',
-                'data': [self._fallback_address_prediction(addr)['data'] for addr in addresses],
+                'data': [item['data'] for item in results],
                 'count': len(addresses)
             }
         
         return result
     
-    def _fallback_address_prediction(self, address: str) -> Dict[str, Any]:
+    def _fallback_address_prediction(self, address: str, now_iso: Optional[str] = None) -> Dict[str, Any]:
         """地址预测的兜底方案（基于规则的简单预测）"""
         # 简单的规则引擎作为兜底
-        risk_score = (hash(address) % 100) / 100.0
+        risk_score = _addr_score(address)
         
         if risk_score > 0.7:
-            risk_type = 'phishing'
-            risk_level = 'high'
-            description = '地址可能存在钓鱼风险（基于规则引擎分析）'
+            level = 0
         elif risk_score > 0.3:
-            risk_type = 'scam'
-            risk_level = 'medium'
-            description = '地址可能存在诈骗风险（基于规则引擎分析）'
+            level = 1
         else:
-            risk_type = 'normal'
-            risk_level = 'safe'
-            description = '地址行为正常（基于规则引擎分析）'
+            level = 2
+        risk_type, risk_level, description = FALLBACK_ADDRESS_RULES[level]
         
         return {
             'status': 'success',
@@ -147,11 +193,44 @@ class ModelClient:
                     'phishing': risk_score if risk_type == 'phishing' else 0.3,
                     'scam': risk_score if risk_type == 'scam' else 0.4
                 },
-                'timestamp': datetime.now(timezone(timedelta(hours=8))).isoformat(),
+                'timestamp': now_iso or datetime.now(CHINA_TZ).isoformat(),
                 'fallback': True  # 标记为兜底方案
             }
         }
     
+    def _fallback_batch_prediction(self, addresses: List[str]) -> List[Dict[str, Any]]:
+        """批量地址预测的兜底方案（向量化计算风险分数和分类）"""
+        now_iso = datetime.now(CHINA_TZ).isoformat()
+        if np is None or not addresses:
+            return [self._fallback_address_prediction(addr, now_iso)['data'] for addr in addresses]
+        
+        scores = np.fromiter((_addr_score(addr) for addr in addresses), dtype=np.float64, count=len(addresses))
+        levels = np.where(scores > 0.7, 0, np.where(scores > 0.3, 1, 2))
+        normal_scores = np.where(levels == 2, 1.0 - scores, 0.3)
+        phishing_scores = np.where(levels == 0, scores, 0.3)
+        scam_scores = np.where(levels == 1, scores, 0.4)
+        
+        return [
+            {
+                'address': addr,
+                'risk_type': FALLBACK_ADDRESS_RULES[level][0],
+                'risk_level': FALLBACK_ADDRESS_RULES[level][1],
+                'confidence': score,
+                'description': FALLBACK_ADDRESS_RULES[level][2],
+                'prediction_scores': {
+                    'normal': normal,
+                    'phishing': phishing,
+                    'scam': scam
+                },
+                'timestamp': now_iso,
+                'fallback': True
+            }
+            for addr, score, level, normal, phishing, scam in zip(
+                addresses, scores.tolist(), levels.tolist(),
+                normal_scores.tolist(), phishing_scores.tolist(), scam_scores.tolist()
+            )
+        ]
+    
     def _fallback_transaction_prediction(self, tx_hash: str) -> Dict[str, Any]:
         """交易预测的兜底方案"""
         risk_score = (hash(tx_hash) % 100) / 100.0
@@ -173,7 +252,7 @@ class ModelClient:
                 'risk_type': risk_type,
                 'risk_level': risk_level,
                 'risk_score': risk_score,
-                'timestamp': datetime.now(timezone(timedelta(hours=8))).isoformat(),
+                'timestamp': datetime.now(CHINA_TZ).isoformat(),
                 'fallback': True
             }
         }
@@ -8,21 +8,58 @@ TrxGNNBert 模型推理服务器
 import os
 import sys
 import torch
-import pickle
-import json
-import numpy as np
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from datetime import datetime, timezone, timedelta
 import logging
+import functools
+
+# 可选依赖：orjson加速JSON序列化
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class OrjsonProvider(JSONProvider):
+    """使用orjson序列化JSON响应"""
+    
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option),
+            mimetype='application/json'
+        )
 
 # Flask应用初始化
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
 # 中国时区
 CHINA_TZ = timezone(timedelta(hours=8))
 
+# 地址风险分数缓存容量
+ADDRESS_CACHE_SIZE = 65536
+
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _addr_score(addr: str) -> float:
+    """基于地址末8位十六进制计算模拟风险分数，跨进程结果一致"""
+    try:
+        return (int(addr[-8:], 16) & 0xFF) / 256.0
+    except (ValueError, TypeError):
+        # 非十六进制地址退回到哈希
+        return (abs(hash(addr)) % 256) / 256.0
+
 class TrxGNNBertInferenceService:
     """TrxGNNBert模型推理服务"""
     
@@ -48,9 +85,8 @@ class TrxGNNBertInferenceService:
     def predict_address_risk(self, address, transaction_data=None):
         """预测地址风险"""
         try:
-            # 简化实现：基于地址哈希生成模拟结果
-            hash_val = hash(address)
-            risk_score = (abs(hash_val) % 100) / 100.0
+            # 简化实现：基于地址生成模拟结果
+            risk_score = _addr_score(address)
             
             if risk_score > 0.7:
                 pred_class = 1  # phishing
@@ -81,6 +117,17 @@ class TrxGNNBertInferenceService:
             
         except Exception as e:
             return {'error': f'预测失败: {str(e)}'}
+    
+    def cache_stats(self):
+        """地址风险分数缓存的命中统计"""
+        info = _addr_score.cache_info()
+        total = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'hit_rate': info.hits / total if total else 0.0
+        }
 
 # 全局模型服务实例
 model_service = TrxGNNBertInferenceService()
@@ -92,6 +139,7 @@ def health_check():
         'status': 'healthy',
         'model_loaded': model_service.is_loaded,
         'device': str(model_service.device),
+        'cache': model_service.cache_stats(),
         'timestamp': datetime.now(CHINA_TZ).isoformat()
     })
 
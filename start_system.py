@@ -4,22 +4,63 @@
 import os
 import sys
 import time
-import subprocess
 import signal
+import socket
 import webbrowser
 import threading
-from pathlib import Path
+import functools
+import http.server
 
-# 导入app.py的核心组件（静默导入）
+# 可选依赖：waitress作为多线程WSGI服务器
 try:
-    sys.path.insert(0, 'frontend')
-    from app import app, analyzer, check_dependencies, ENHANCED_MODE
-    APP_AVAILABLE = True
+    from waitress import serve as waitress_serve
+    WAITRESS_AVAILABLE = True
 except ImportError:
-    APP_AVAILABLE = False
+    WAITRESS_AVAILABLE = False
+
+# app.py的核心组件，首次使用时才导入（None表示尚未尝试导入）
+APP_AVAILABLE = None
+app = analyzer = check_dependencies = None
+ENHANCED_MODE = False
+
+def _load_app():
+    """按需导入app.py的核心组件（静默导入，只导入一次）"""
+    global APP_AVAILABLE, app, analyzer, check_dependencies, ENHANCED_MODE
+    if APP_AVAILABLE is None:
+        try:
+            sys.path.insert(0, 'frontend')
+            from app import app, analyzer, check_dependencies, ENHANCED_MODE
+            APP_AVAILABLE = True
+        except ImportError:
+            APP_AVAILABLE = False
+    return APP_AVAILABLE
+
+# 快速启动：跳过加载动画的等待时间
+FAST_STARTUP = os.environ.get("ETHERSENTINEL_FAST", "0") == "1"
+
+# AI系统状态展示项，运行时只填充动态字段
+SERVICES_TEMPLATE = (
+    ("🤖 TrxGNNBert核心模型", "{enhanced_status}"),
+    ("🧠 图神经网络引擎", "{enhanced_status}"),
+    ("🤖 Transformer推理", "✅ 就绪"),
+    ("📡 模型API服务", "✅ 端口5000"),
+    ("🌐 前端Web界面", "✅ 端口8080"),
+    ("🔗 前后端通信", "✅ 正常"),
+    ("💾 威胁数据库({db_size}条)", "{db_status}"),
+    ("🛡️ 威胁检测引擎", "✅ 活跃")
+)
+
+@functools.lru_cache(maxsize=None)
+def _exists(path):
+    """检查路径是否存在（进程内缓存结果）"""
+    return os.path.exists(path)
 
 def show_loading_animation(text, duration=2.0):
     """显示加载动画"""
+    if FAST_STARTUP:
+        print(f"\n{text} ✅")
+        return
+    
     print(f"\n{text}", end="")
     steps = int(duration * 4)  # 每秒4次更新
     for i in range(steps):
@@ -70,23 +111,18 @@ def show_fake_ai_status():
     print("-" * 50)
     
     # 实际检查系统状态但以AI的方式呈现
-    enhanced_status = "✅ 已加载" if (APP_AVAILABLE and ENHANCED_MODE) else "⚠️  基础模式"
-    db_size = len(analyzer.phishing_addresses) if APP_AVAILABLE else 0
+    app_available = _load_app()
+    enhanced_status = "✅ 已加载" if (app_available and ENHANCED_MODE) else "⚠️  基础模式"
+    db_size = len(analyzer.phishing_addresses) if app_available else 0
     db_status = "✅ 已优化" if db_size > 0 else "⚠️  示例数据"
     
-    services = [
-        ("🤖 TrxGNNBert核心模型", enhanced_status),
-        ("🧠 图神经网络引擎", enhanced_status), 
-        ("🤖 Transformer推理", "✅ 就绪"),
-        ("📡 模型API服务", "✅ 端口5000"),
-        ("🌐 前端Web界面", "✅ 端口8080"),
-        ("🔗 前后端通信", "✅ 正常"),
-        (f"💾 威胁数据库({db_size}条)", db_status),
-        ("🛡️ 威胁检测引擎", "✅ 活跃")
-    ]
-    
-    for service, status in services:
-        print(f"{service:<25} {status}")
+    fields = {
+        'enhanced_status': enhanced_status,
+        'db_size': db_size,
+        'db_status': db_status
+    }
+    for service, status in SERVICES_TEMPLATE:
+        print(f"{service.format(**fields):<25} {status.format(**fields)}")
     
     print("-" * 50)
     print("🎯 AI模型功能: 地址风险检测 | 交易行为分析 | 威胁识别")
@@ -94,39 +130,49 @@ def show_fake_ai_status():
 
 def silent_dependency_check():
     """静默检查依赖"""
-    if APP_AVAILABLE:
+    if _load_app():
         return check_dependencies()
     return True
 
+class _QuietHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """静态文件请求处理器，不输出访问日志"""
+    
+    def log_message(self, format, *args):
+        pass
+
 def start_frontend_server():
-    """启动前端静态服务器"""
+    """启动前端静态服务器（进程内多线程服务）"""
     try:
-        frontend_dir = Path("frontend")
-        if not frontend_dir.exists():
+        if not _exists("frontend"):
             return None
         
         # 启动前端静态服务器
-        cmd = [sys.executable, '-m', 'http.server', '8080']
-        process = subprocess.Popen(
-            cmd,
-            cwd=frontend_dir,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
+        handler = functools.partial(_QuietHTTPRequestHandler, directory=os.path.abspath("frontend"))
+        server = http.server.ThreadingHTTPServer(('', 8080), handler)
+        server.daemon_threads = True
+        server_thread = threading.Thread(
+            target=server.serve_forever,
+            kwargs={'poll_interval': 0.5},
+            daemon=True
         )
+        server_thread.start()
         
-        return process
+        return server
         
     except Exception:
         return None
 
 def start_flask_app():
     """在后台启动Flask应用"""
-    if not APP_AVAILABLE:
+    if not _load_app():
         return None
     
     def run_flask():
         try:
-            app.run(debug=False, host='0.0.0.0', port=5000, use_reloader=False)
+            if WAITRESS_AVAILABLE:
+                waitress_serve(app, host='0.0.0.0', port=5000, threads=8)
+            else:
+                app.run(debug=False, host='0.0.0.0', port=5000, threaded=True, use_reloader=False)
         except Exception:
             pass
     
@@ -134,6 +180,25 @@ def start_flask_app():
     flask_thread.start()
     return flask_thread
 
+def is_port_ready(port, host='127.0.0.1'):
+    """检查本地端口是否已开始监听"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.05)
+        return sock.connect_ex((host, port)) == 0
+
+def wait_for_ports(ports, timeout=2.0, interval=0.025):
+    """轮询等待所有端口就绪，超时返回False"""
+    deadline = time.monotonic() + timeout
+    pending = set(ports)
+    while pending:
+        pending = {port for port in pending if not is_port_ready(port)}
+        if not pending:
+            break
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+    return True
+
 def start_complete_system():
     """启动完整系统服务"""
     print("\n🌐 正在启动系统服务...")
@@ -144,72 +209,81 @@ def start_complete_system():
     if not silent_dependency_check():
         print("⚠️  部分功能可能受限")
     
-    # 启动前端服务器
-    frontend_process = start_frontend_server()
-    if frontend_process:
-        processes.append(('frontend', frontend_process))
-        show_loading_animation("🔧 前端服务初始化", 1.5)
+    # 同时启动前端服务器和Flask应用，再统一等待就绪
+    ports = []
+    frontend_server = start_frontend_server()
+    if frontend_server:
+        processes.append(('frontend', frontend_server))
+        ports.append(8080)
     
-    # 启动Flask应用
     flask_thread = start_flask_app()
     if flask_thread:
-        show_loading_animation("🔧 API服务初始化", 2.0)
+        ports.append(5000)
     
     # 等待服务启动
-    time.sleep(1)
-    
-    print("✅ 全部服务启动成功")
-    print("✅ AI模型API: http://localhost:5000")
-    print("✅ Web界面: http://localhost:8080")
+    if wait_for_ports(ports):
+        print("✅ 全部服务启动成功")
+        print("✅ AI模型API: http://localhost:5000")
+        print("✅ Web界面: http://localhost:8080")
+    else:
+        print("⚠️  部分服务启动较慢，请稍后访问")
     
     return processes
 
 def show_system_info():
     """显示系统访问信息"""
-    print("\n" + "🎉" * 30)
-    print("🚀 鉴诈链图 AI系统启动完成!")
-    print("🎉" * 60)
-    
     # 获取实际系统状态
-    mode_status = "增强模式" if (APP_AVAILABLE and ENHANCED_MODE) else "基础模式"
-    db_count = len(analyzer.phishing_addresses) if APP_AVAILABLE else 0
-    
-    print("\n📋 系统访问地址:")
-    print("   🌐 主页面: http://localhost:8080/auth.html")
-    print("   📊 控制台: http://localhost:8080/dashboard.html")
-    print("   🔍 检测工具: http://localhost:8080/advanced-tools.html")
-    print("   📈 风险报告: http://localhost:8080/risk-report.html")
-    print("   🔌 API服务: http://localhost:5000/api/health")
+    app_available = _load_app()
+    mode_status = "增强模式" if (app_available and ENHANCED_MODE) else "基础模式"
+    db_count = len(analyzer.phishing_addresses) if app_available else 0
     
-    print("\n🧠 AI能力演示:")
-    print("   ✨ 智能地址风险检测 (基于TrxGNNBert)")
-    print("   ✨ 实时交易风险分析")
-    print("   ✨ 钓鱼活动模式识别") 
-    print("   ✨ 异常行为智能发现")
-    print("   ✨ 可视化威胁报告")
-    
-    print("\n💡 技术架构:")
-    print("   🧠 图神经网络 + Transformer融合")
-    print("   ⚡ GPU加速实时推理")
-    print("   🎯 三分类威胁检测 (正常/钓鱼/诈骗)")
-    print(f"   📊 运行模式: {mode_status}")
-    print(f"   🛡️ 威胁数据库: {db_count} 条记录")
-    
-    print("\n👤 登录信息:")
-    print("   用户名: admin")
-    print("   密码: admin123")
-    
-    print("\n⚠️  操作提示:")
-    print("   - AI模型已完全加载，可直接使用检测功能")
-    print("   - 推荐使用Chrome或Edge浏览器访问")
-    print("   - 按 Ctrl+C 可以停止系统")
-    
-    print("\n" + "🎉" * 60)
+    # 整块信息拼接后一次性输出
+    lines = [
+        "",
+        "🎉" * 30,
+        "🚀 鉴诈链图 AI系统启动完成!",
+        "🎉" * 60,
+        "",
+        "📋 系统访问地址:",
+        "   🌐 主页面: http://localhost:8080/auth.html",
+        "   📊 控制台: http://localhost:8080/dashboard.html",
+        "   🔍 检测工具: http://localhost:8080/advanced-tools.html",
+        "   📈 风险报告: http://localhost:8080/risk-report.html",
+        "   🔌 API服务: http://localhost:5000/api/health",
+        "",
+        "🧠 AI能力演示:",
+        "   ✨ 智能地址风险检测 (基于TrxGNNBert)",
+        "   ✨ 实时交易风险分析",
+        "   ✨ 钓鱼活动模式识别",
+        "   ✨ 异常行为智能发现",
+        "   ✨ 可视化威胁报告",
+        "",
+        "💡 技术架构:",
+        "   🧠 图神经网络 + Transformer融合",
+        "   ⚡ GPU加速实时推理",
+        "   🎯 三分类威胁检测 (正常/钓鱼/诈骗)",
+        f"   📊 运行模式: {mode_status}",
+        f"   🛡️ 威胁数据库: {db_count} 条记录",
+        "",
+        "👤 登录信息:",
+        "   用户名: admin",
+        "   密码: admin123",
+        "",
+        "⚠️  操作提示:",
+        "   - AI模型已完全加载，可直接使用检测功能",
+        "   - 推荐使用Chrome或Edge浏览器访问",
+        "   - 按 Ctrl+C 可以停止系统",
+        "",
+        "🎉" * 60,
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 def auto_open_browser():
     """自动打开浏览器"""
     def open_browser():
-        time.sleep(3)  # 等待服务完全启动
+        # 轮询等待前端端口就绪（最多约3秒）
+        wait_for_ports([8080], timeout=3.0, interval=0.05)
         try:
             print("🌐 正在打开浏览器...")
             webbrowser.open('http://localhost:8080/auth.html')
@@ -225,7 +299,7 @@ def main():
     
     try:
         # 检查基础文件
-        if not Path("frontend").exists():
+        if not _exists("frontend"):
             print("❌ 错误: 未找到frontend目录")
             print("请确保在正确目录下运行此脚本")
             return
@@ -255,15 +329,13 @@ def main():
         print("\n🛑 正在停止AI系统...")
         
     finally:
-        # 清理进程
-        for name, process in processes:
+        # 停止进程内的服务（前端服务器已不再是子进程）
+        for name, server in processes:
             try:
-                if hasattr(process, 'terminate'):
-                    process.terminate()
-                    process.wait(timeout=3)
+                server.shutdown()
+                server.server_close()
             except:
-                if hasattr(process, 'kill'):
-                    process.kill()
+                pass
         
         print("✅ AI系统已完全停止")
 